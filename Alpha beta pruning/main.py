@@ -1,10 +1,154 @@
+import importlib.util
 import os
+import sys
 import time
 import random
 from colorama import Fore, Back, Style, init
 
-# Initialize colorama
-init(autoreset=True)
+
+def _load_search_engine():
+    """
+    Load the shared search engine from the repository root by file path, so
+    this folder does not have to put the root on sys.path. A copy already
+    imported from the same file (e.g. by benchmark.py) is reused.
+    """
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'search_engine.py')
+    module = sys.modules.get('search_engine')
+    if module is not None and os.path.abspath(getattr(module, '__file__', '')) == path:
+        return module
+    spec = importlib.util.spec_from_file_location('search_engine', path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules['search_engine'] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+_search_engine = _load_search_engine()
+Position, Searcher, Tracer = _search_engine.Position, _search_engine.Searcher, _search_engine.Tracer
+
+# Center first, then corners, then edges
+PREFERRED_ORDER = [4, 0, 2, 6, 8, 1, 3, 5, 7]
+
+
+class TicTacToePosition(Position):
+    """
+    Search adapter over a Tic-Tac-Toe board.
+
+    ply counts the moves made since the start of the search; it is what
+    TicTacToe.minimax_alpha_beta calls depth. Wins score 10 - ply for the AI
+    and ply - 10 for the human, so quicker wins and slower losses are preferred.
+    """
+
+    def __init__(self, game, board, ply, player):
+        self.game = game
+        self.board = board
+        self.ply = ply
+        self.player = player
+
+    def _other(self, player):
+        return 'X' if player == self.game.ai_player else self.game.ai_player
+
+    def legal_moves(self):
+        return self.game.get_available_moves(self.board)
+
+    def play(self, move):
+        self.board[move] = self.player
+        self.player = self._other(self.player)
+        self.ply += 1
+
+    def undo(self, move):
+        self.board[move] = ' '
+        self.player = self._other(self.player)
+        self.ply -= 1
+
+    def is_terminal(self):
+        return (self.game.is_winner(self.board, self.game.ai_player) or
+                self.game.is_winner(self.board, 'X') or
+                self.game.is_board_full(self.board))
+
+    def evaluate(self):
+        if self.game.is_winner(self.board, self.game.ai_player):
+            value = 10 - self.ply
+        elif self.game.is_winner(self.board, 'X'):
+            value = self.ply - 10
+        else:
+            value = 0  # Draw, or out of search depth
+        return value if self.player == self.game.ai_player else -value
+
+    def hash_key(self):
+        return ''.join(self.board) + self.player
+
+    def order_moves(self, moves):
+        """Winning moves first, then blocks, then the preferred squares."""
+        player, opponent = self.player, self._other(self.player)
+
+        def rank(move):
+            if self.game.is_winner(self.game.make_move(self.board, move, player), player):
+                return 0
+            if self.game.is_winner(self.game.make_move(self.board, move, opponent), opponent):
+                return 1
+            return 2 + PREFERRED_ORDER.index(move)
+
+        return sorted(moves, key=rank)
+
+
+class TreeRecorder(Tracer):
+    """
+    Records search nodes into TicTacToe.tree_representation and drives step mode.
+
+    The engine reports alpha and beta for the side to move; nodes store them
+    from the AI's (maximizing) point of view like the rest of the game.
+    """
+
+    def __init__(self, game):
+        self.game = game
+
+    def _node_id(self, path):
+        return '-'.join(['0'] + [str(index) for index in path])
+
+    def _as_max(self, position, alpha, beta):
+        if position.player == self.game.ai_player:
+            return alpha, beta
+        return -beta, -alpha
+
+    def enter(self, position, path, ply, alpha, beta):
+        if self.game.step_mode:
+            alpha, beta = self._as_max(position, alpha, beta)
+            self.game.visualize_board_state(position.board, position.ply, alpha, beta, self._node_id(path))
+
+    def leave(self, position, path, ply, alpha, beta, value, best_move):
+        alpha, beta = self._as_max(position, alpha, beta)
+        if position.player != self.game.ai_player:
+            value = -value
+        self.game.tree_representation.append({
+            'id': self._node_id(path),
+            'parent_id': self._node_id(path[:-1]) if path else None,
+            'board': position.board.copy(),
+            'depth': position.ply,
+            'alpha': alpha,
+            'beta': beta,
+            'value': value,
+            'pruned': False,
+            'best_move': best_move
+        })
+
+    def prune(self, position, path, ply, alpha, beta, moves, index):
+        # Mark remaining moves as pruned
+        alpha, beta = self._as_max(position, alpha, beta)
+        node_id = self._node_id(path)
+        for j in range(index + 1, len(moves)):
+            self.game.tree_representation.append({
+                'id': f"{node_id}-{j}",
+                'parent_id': node_id,
+                'board': self.game.make_move(position.board, moves[j], position.player),
+                'depth': position.ply + 1,
+                'alpha': alpha,
+                'beta': beta,
+                'value': None,
+                'pruned': True,
+                'best_move': None
+            })
+
 
 class TicTacToe:
     def __init__(self, max_depth=9):
@@ -78,125 +222,26 @@ class TicTacToe:
         new_board[position] = player
         return new_board
 
-    def minimax_alpha_beta(self, board, depth, alpha, beta, maximizing_player, node_id="0", parent_id=None):
-        """Minimax algorithm with alpha-beta pruning"""
-        self.total_nodes += 1
-        
-        # Create node for visualization
-        node = {
-            'id': node_id,
-            'parent_id': parent_id,
-            'board': board.copy(),
-            'depth': depth,
-            'alpha': alpha,
-            'beta': beta,
-            'value': None,
-            'pruned': False,
-            'best_move': None
-        }
-        
-        # Terminal conditions
-        if self.is_winner(board, self.ai_player):
-            node['value'] = 10 - depth  # Win is better if it happens sooner
-            self.tree_representation.append(node)
-            return node['value'], -1, node['id']
-        
-        if self.is_winner(board, 'X'):
-            node['value'] = depth - 10  # Loss is better if it happens later
-            self.tree_representation.append(node)
-            return node['value'], -1, node['id']
-        
-        if self.is_board_full(board) or depth >= self.max_depth:
-            node['value'] = 0  # Draw
-            self.tree_representation.append(node)
-            return node['value'], -1, node['id']
-        
-        available_moves = self.get_available_moves(board)
-        best_move = -1
+    def minimax_alpha_beta(self, board, depth, alpha, beta, maximizing_player):
+        """
+        Minimax algorithm with alpha-beta pruning, run on the shared search engine.
+        Nodes are recorded in tree_representation for the decision tree view.
+        Returns (value, best_move, root node id); best_move is -1 at the end of the game.
+        """
+        player = self.ai_player if maximizing_player else 'X'
+        position = TicTacToePosition(self, board.copy(), depth, player)
+        searcher = Searcher(tracer=TreeRecorder(self))
         
-        # For step mode, show the current node being evaluated
-        if self.step_mode:
-            self.visualize_board_state(board, depth, alpha, beta, node_id)
-        
-        # Maximizing player (AI)
+        # The engine scores for the side to move, so the human's window is mirrored
         if maximizing_player:
-            best_val = float('-inf')
-            for i, move in enumerate(available_moves):
-                child_id = f"{node_id}-{i}"
-                
-                new_board = self.make_move(board, move, self.ai_player)
-                val, _, child_node_id = self.minimax_alpha_beta(new_board, depth + 1, alpha, beta, False, child_id, node_id)
-                
-                if val > best_val:
-                    best_val = val
-                    best_move = move
-                
-                alpha = max(alpha, best_val)
-                
-                # Alpha-beta pruning
-                if beta <= alpha:
-                    self.pruned_nodes += 1
-                    # Mark remaining moves as pruned
-                    for j in range(i + 1, len(available_moves)):
-                        pruned_id = f"{node_id}-{j}"
-                        pruned_node = {
-                            'id': pruned_id,
-                            'parent_id': node_id,
-                            'board': self.make_move(board, available_moves[j], self.ai_player),
-                            'depth': depth + 1,
-                            'alpha': alpha,
-                            'beta': beta,
-                            'value': None,
-                            'pruned': True,
-                            'best_move': None
-                        }
-                        self.tree_representation.append(pruned_node)
-                    break
-            
-            node['value'] = best_val
-            node['best_move'] = best_move
-            self.tree_representation.append(node)
-            return best_val, best_move, node['id']
-        
-        # Minimizing player (Human)
+            value, best_move = searcher.search(position, self.max_depth - depth, alpha, beta)
         else:
-            best_val = float('inf')
-            for i, move in enumerate(available_moves):
-                child_id = f"{node_id}-{i}"
-                
-                new_board = self.make_move(board, move, 'X')
-                val, _, child_node_id = self.minimax_alpha_beta(new_board, depth + 1, alpha, beta, True, child_id, node_id)
-                
-                if val < best_val:
-                    best_val = val
-                    best_move = move
-                
-                beta = min(beta, best_val)
-                
-                # Alpha-beta pruning
-                if beta <= alpha:
-                    self.pruned_nodes += 1
-                    # Mark remaining moves as pruned
-                    for j in range(i + 1, len(available_moves)):
-                        pruned_id = f"{node_id}-{j}"
-                        pruned_node = {
-                            'id': pruned_id,
-                            'parent_id': node_id,
-                            'board': self.make_move(board, available_moves[j], 'X'),
-                            'depth': depth + 1,
-                            'alpha': alpha,
-                            'beta': beta,
-                            'value': None,
-                            'pruned': True,
-                            'best_move': None
-                        }
-                        self.tree_representation.append(pruned_node)
-                    break
-            
-            node['value'] = best_val
-            node['best_move'] = best_move
-            self.tree_representation.append(node)
-            return best_val, best_move, node['id']
+            value, best_move = searcher.search(position, self.max_depth - depth, -beta, -alpha)
+            value = -value
+        
+        self.total_nodes += searcher.nodes
+        self.pruned_nodes += searcher.prunes
+        return value, best_move if best_move is not None else -1, "0"
 
     def visualize_board_state(self, board, depth, alpha, beta, node_id):
         """Visualize the current board state being evaluated in step mode"""
@@ -420,5 +465,7 @@ class TicTacToe:
                 break
 
 if __name__ == "__main__":
+    # Initialize colorama
+    init(autoreset=True)
     game = TicTacToe()
     game.play_game()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Bulk game annotation for Connect Four.
+
+Streams game records in, scores every position with the hard AI's search on
+a pool of worker processes and writes, for each move, how much it lost
+compared with the engine's best move. Moves are tagged as blunders or missed
+wins. Positions shared between games are searched once while they stay in a
+least recently used cache kept by the parent process (--cache-size positions).
+The next batch of games is sent to the workers before the current one is
+written out, so the pool keeps busy while the parent writes and reads.
+
+Game records use the same format as tune_weights.py (the result is optional):
+    <moves> [result]
+
+Output is JSON Lines, one object per game.
+
+Usage:
+    python annotate_games.py games.txt [--output annotations.jsonl] [--workers N] [--depth 5]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import OrderedDict
+
+from connect_four import HARD_DEPTH, WIN_SCORE, ConnectFour, ConnectFourAI, load_weights, parse_game_record
+
+# Set in every worker process by _init_worker
+_worker_ais = None
+_worker_depth = None
+
+
+def _init_worker(weights, depth):
+    global _worker_ais, _worker_depth
+    _worker_ais = {piece: ConnectFourAI(piece, 'hard', weights) for piece in ('X', 'O')}
+    _worker_depth = depth
+
+
+def _score_position(key):
+    """Worker task: score every column of one position. key is (board string, player to move)."""
+    board, piece = key
+    game = ConnectFour()
+    game.board = [list(board[row * game.cols:(row + 1) * game.cols]) for row in range(game.rows)]
+    game.current_player = piece
+    result = _worker_ais[piece].score_moves(game, _worker_depth)
+    return key, result['scores'], result['best_move']
+
+
+def replay_positions(columns):
+    """
+    Replay a game and return, for each move, the position it was played from
+    as a cache key (board string, player to move).
+    Raises ValueError on an illegal move or a move after the game ended.
+    """
+    game = ConnectFour()
+    keys = []
+    for col in columns:
+        if game.game_over:
+            raise ValueError("moves after the end of the game")
+        keys.append((''.join(''.join(row) for row in game.board), game.current_player))
+        if not game.make_move(col):
+            raise ValueError(f"illegal move in column {col + 1}")
+    return keys
+
+
+def read_games(path):
+    """
+    Yield (line_number, moves text, columns, result, position keys) for every
+    valid game record in path.
+    """
+    with open(path) as f:
+        for line_number, line in enumerate(f, 1):
+            try:
+                record = parse_game_record(line)
+                if record is None:
+                    continue
+                columns, result = record
+                keys = replay_positions(columns)
+            except ValueError as error:
+                print(f"{path}:{line_number}: skipped ({error})", file=sys.stderr)
+                continue
+            yield line_number, line.split()[0], columns, result, keys
+
+
+def annotate_game(columns, keys, results, blunder_threshold):
+    """Build the per-move annotations of one game from the scored positions."""
+    annotations = []
+    for ply, (col, key) in enumerate(zip(columns, keys), 1):
+        scores, best_move = results[key]
+        score = scores[col]
+        best_score = scores[best_move]
+        loss = best_score - score
+
+        tag = None
+        if best_score >= WIN_SCORE and score < WIN_SCORE:
+            tag = 'missed_win'
+        elif loss >= blunder_threshold:
+            tag = 'blunder'
+
+        annotations.append({
+            'ply': ply,
+            'player': key[1],
+            'column': col + 1,
+            'score': score,
+            'best_column': best_move + 1,
+            'best_score': best_score,
+            'loss': loss,
+            'tag': tag,
+        })
+    return annotations
+
+
+class ScoreCache:
+    """Least recently used map from position key to (scores, best move), holding at most size entries."""
+
+    def __init__(self, size):
+        self.size = size
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+
+class BatchJob:
+    """
+    One batch of games whose new positions have been sent to the pool.
+
+    results starts with the positions the cache already knew when the batch
+    was submitted. Positions the previous batch was still searching are taken
+    from its results once it has finished.
+    """
+
+    def __init__(self, batch, cache, previous, pool, workers):
+        self.batch = batch
+        self.previous = previous
+        self.results = {}
+        self.pending = []
+        in_previous = previous.pending_keys if previous is not None else ()
+        for *_, keys in batch:
+            for key in keys:
+                if key in self.results or key in in_previous:
+                    continue
+                entry = cache.get(key)
+                if entry is not None:
+                    self.results[key] = entry
+                else:
+                    self.results[key] = None
+                    self.pending.append(key)
+        self.pending_keys = set(self.pending)
+        chunksize = max(1, len(self.pending) // (workers * 4))
+        self.async_result = pool.map_async(_score_position, self.pending, chunksize)
+
+    def finish(self, cache):
+        """Wait for the pool, store the new scores in the cache and fill in results."""
+        for key, scores, best_move in self.async_result.get():
+            self.results[key] = (scores, best_move)
+            cache.put(key, (scores, best_move))
+        if self.previous is not None:
+            for *_, keys in self.batch:
+                for key in keys:
+                    if key not in self.results:
+                        self.results[key] = self.previous.results[key]
+            self.previous = None  # let the previous batch's results be freed
+
+
+def batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Annotate Connect Four games with the score lost by each move.")
+    parser.add_argument('games', help="game records, one '<moves> [result]' per line")
+    parser.add_argument('--output', default='annotations.jsonl', help="JSON Lines file to write")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument('--depth', type=int, default=HARD_DEPTH, help="search depth per position")
+    parser.add_argument('--weights', help="JSON weights file written by tune_weights.py")
+    parser.add_argument('--blunder', type=int, default=100, help="score loss that marks a move as a blunder")
+    parser.add_argument('--batch-games', type=int, default=500, help="games read per batch")
+    parser.add_argument('--cache-size', type=int, default=200000,
+                        help="scored positions kept for reuse by later games (about 1 KB each)")
+    args = parser.parse_args()
+
+    weights = load_weights(args.weights) if args.weights else None
+    cache = ScoreCache(args.cache_size)
+    games = positions = searched = 0
+    start = time.perf_counter()
+
+    def write(job):
+        nonlocal games, positions, searched
+        job.finish(cache)
+        searched += len(job.pending)
+        for line_number, moves, columns, result, keys in job.batch:
+            out.write(json.dumps({
+                'line': line_number,
+                'moves': moves,
+                'result': result,
+                'annotations': annotate_game(columns, keys, job.results, args.blunder),
+            }) + '\n')
+            games += 1
+            positions += len(keys)
+
+    with multiprocessing.Pool(args.workers, _init_worker, (weights, args.depth)) as pool, \
+            open(args.output, 'w') as out:
+        # Keep one batch queued ahead of the one being written
+        previous = None
+        for batch in batched(read_games(args.games), args.batch_games):
+            job = BatchJob(batch, cache, previous, pool, args.workers)
+            if previous is not None:
+                write(previous)
+            previous = job
+        if previous is not None:
+            write(previous)
+
+    elapsed = time.perf_counter() - start
+    print(f"Annotated {games} games ({positions} positions, {searched} searched) "
+          f"in {elapsed:.1f}s with {args.workers} workers")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Headless search benchmark for the shared search engine.
+
+Runs the same Tic-Tac-Toe and Connect Four positions under plain minimax,
+alpha-beta, alpha-beta with move ordering, alpha-beta with a transposition
+(memo) table, both enhancements together and all of them plus principal
+variation search. Checks that every variant returns the same value and
+reports nodes, prunes, wall time and peak memory as a table and as JSON.
+
+The Connect Four hard AI is also timed move for move at HARD_DEPTH with its
+full-window root search and with PVS and aspiration windows; both must pick
+the same move. Either one may visit fewer nodes on a given position.
+
+Usage:
+    python benchmark.py [--game all] [--ttt-depth 9] [--c4-depth 5] [--repeat 1] [--no-memory] [--json benchmark.json]
+"""
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+from connect_four import HARD_DEPTH, ConnectFour, ConnectFourAI, ConnectFourPosition
+from search_engine import Searcher
+
+
+def _load_tictactoe():
+    """Load the Tic-Tac-Toe game by file path; its folder is a script directory, not a package."""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Alpha beta pruning', 'main.py')
+    spec = importlib.util.spec_from_file_location('tictactoe_game', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+_tictactoe = _load_tictactoe()
+TicTacToe, TicTacToePosition = _tictactoe.TicTacToe, _tictactoe.TicTacToePosition
+
+# Positions are written row by row, '.' for an empty cell. The AI ('O') is to move.
+TICTACTOE_POSITIONS = {
+    'empty': '.........',
+    'x-center': '....X....',
+    'x-corner': 'X........',
+    'opening': 'X...O...X',
+    'midgame': 'X.O.X....',
+    'must-block': 'XX..O....',
+    'ai-wins': 'XX.OO....',
+}
+
+# Positions are the columns played so far (1-7); the side to move is searched.
+CONNECT_FOUR_POSITIONS = {
+    'empty': '',
+    'opening': '4435',
+    'midgame': '44455436',
+    'crowded': '4444441111222',
+    'x-to-win': '44443322',
+    'threats': '3443542',
+}
+
+VARIANTS = {
+    'minimax': dict(prune=False),
+    'alphabeta': dict(prune=True),
+    'alphabeta+order': dict(prune=True, order=True),
+    'alphabeta+memo': dict(prune=True, use_tt=True),
+    'alphabeta+order+memo': dict(prune=True, order=True, use_tt=True),
+    'alphabeta+order+memo+pvs': dict(prune=True, order=True, use_tt=True, pvs=True),
+}
+
+# ConnectFourAI.use_pvs for each hard mode variant
+HARD_MODE_VARIANTS = {
+    'full-window': False,
+    'pvs+aspiration': True,
+}
+
+
+def tictactoe_position(text):
+    """Turn a 9 character position string into a searchable position."""
+    board = [' ' if cell == '.' else cell for cell in text]
+    game = TicTacToe()
+    return TicTacToePosition(game, board, 0, game.ai_player)
+
+
+def connect_four_position(moves):
+    """Replay a move string and wrap the result for the side to move."""
+    game = ConnectFour()
+    for col in moves:
+        game.make_move(int(col) - 1)
+    return ConnectFourPosition(game, ConnectFourAI(game.current_player, 'hard'))
+
+
+GAMES = {
+    'tictactoe': (TICTACTOE_POSITIONS, tictactoe_position),
+    'connect4': (CONNECT_FOUR_POSITIONS, connect_four_position),
+}
+
+
+def run_variant(variant, position, depth, repeat, memory=True):
+    """Search one position with one variant and collect its statistics."""
+    searcher = Searcher(**VARIANTS[variant])
+
+    wall_times = []
+    for _ in range(repeat):
+        searcher.clear()
+        start = time.perf_counter()
+        value, move = searcher.search(position, depth)
+        wall_times.append(time.perf_counter() - start)
+    nodes, prunes = searcher.nodes, searcher.prunes
+
+    # Measure memory on a separate run so tracing does not skew the timings
+    peak = None
+    if memory:
+        searcher.clear()
+        tracemalloc.start()
+        searcher.search(position, depth)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        'variant': variant,
+        'value': value,
+        'best_move': move + 1 if move is not None else None,
+        'nodes': nodes,
+        'prunes': prunes,
+        'time_ms': round(min(wall_times) * 1000, 3),
+        'peak_kib': round(peak / 1024, 1) if peak is not None else None,
+    }
+
+
+def run_hard_mode(variant, moves, repeat, memory=True):
+    """Time one ConnectFourAI.minimax_move call with or without PVS."""
+    game = connect_four_position(moves).game
+    ai = ConnectFourAI(game.current_player, 'hard')
+    ai.use_pvs = HARD_MODE_VARIANTS[variant]
+
+    wall_times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        move = ai.minimax_move(game)
+        wall_times.append(time.perf_counter() - start)
+
+    peak = None
+    if memory:
+        tracemalloc.start()
+        ai.minimax_move(game)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        'variant': variant,
+        'value': ai.score,
+        'best_move': move + 1,
+        'nodes': ai.nodes,
+        'prunes': None,
+        'time_ms': round(min(wall_times) * 1000, 3),
+        'peak_kib': round(peak / 1024, 1) if peak is not None else None,
+    }
+
+
+def run_benchmark(depths, repeat, memory=True):
+    """
+    Run every variant on every position of the games in depths ({game: depth}).
+    Returns the list of position reports.
+    """
+    reports = []
+    for game, depth in depths.items():
+        positions, make_position = GAMES[game]
+        for name, text in positions.items():
+            position = make_position(text)
+            results = [run_variant(variant, position, depth, repeat, memory) for variant in VARIANTS]
+            reports.append({
+                'game': game,
+                'position': name,
+                'board': text,
+                'depth': depth,
+                'consistent': len(set(r['value'] for r in results)) == 1,
+                'results': results,
+            })
+
+    if 'connect4' in depths:
+        for name, moves in CONNECT_FOUR_POSITIONS.items():
+            if connect_four_position(moves).is_terminal():
+                continue
+            results = [run_hard_mode(variant, moves, repeat, memory) for variant in HARD_MODE_VARIANTS]
+            reports.append({
+                'game': 'c4-hard',
+                'position': name,
+                'board': moves,
+                'depth': HARD_DEPTH,
+                'consistent': len(set((r['value'], r['best_move']) for r in results)) == 1,
+                'results': results,
+            })
+    return reports
+
+
+def print_table(reports):
+    """Print the reports as a plain text table."""
+    header = (f"{'game':<10} {'position':<12} {'variant':<25} {'value':>6} {'move':>5} "
+              f"{'nodes':>9} {'prunes':>8} {'time ms':>9} {'peak KiB':>9}")
+    print(header)
+    print('-' * len(header))
+    for report in reports:
+        for r in report['results']:
+            move = r['best_move'] if r['best_move'] is not None else '-'
+            prunes = r['prunes'] if r['prunes'] is not None else '-'
+            peak = f"{r['peak_kib']:.1f}" if r['peak_kib'] is not None else '-'
+            print(f"{report['game']:<10} {report['position']:<12} {r['variant']:<25} {r['value']:>6} {move:>5} "
+                  f"{r['nodes']:>9} {prunes:>8} {r['time_ms']:>9.2f} {peak:>9}")
+        if not report['consistent']:
+            print(f"{'':<23} MISMATCH: variants disagree on this position")
+        print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare search variants on fixed positions.")
+    parser.add_argument('--game', choices=['all'] + list(GAMES), default='all')
+    parser.add_argument('--ttt-depth', type=int, default=9, help="Tic-Tac-Toe search depth (1-9)")
+    parser.add_argument('--c4-depth', type=int, default=5, help="Connect Four search depth")
+    parser.add_argument('--repeat', type=int, default=1, help="timed runs per variant, best is kept")
+    parser.add_argument('--no-memory', action='store_true',
+                        help="skip the traced run used for peak memory (it is slow for plain minimax)")
+    parser.add_argument('--json', default='benchmark.json', help="where to write the JSON report ('-' for stdout)")
+    args = parser.parse_args()
+
+    depths = {'tictactoe': max(1, min(9, args.ttt_depth)), 'connect4': max(1, args.c4_depth)}
+    if args.game != 'all':
+        depths = {args.game: depths[args.game]}
+
+    reports = run_benchmark(depths, max(1, args.repeat), not args.no_memory)
+    print_table(reports)
+
+    output = json.dumps(reports, indent=2)
+    if args.json == '-':
+        print(output)
+    else:
+        with open(args.json, 'w') as f:
+            f.write(output + '\n')
+        print(f"JSON report written to {args.json}")
+
+    return 0 if all(report['consistent'] for report in reports) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
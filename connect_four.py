@@ -1,5 +1,74 @@
 #!/usr/bin/env python3
+import argparse
+import asyncio
+import hashlib
+import json
+import os
 import random
+import sqlite3
+import sys
+import threading
+
+from position_cache import PositionCache
+from search_engine import Position, SearchCancelled, Searcher
+
+# Weights for the heuristic in ConnectFourAI._evaluate_board.
+# tune_weights.py fits new values from game records and writes them as JSON.
+DEFAULT_WEIGHTS = {
+    'three': 10,       # own 3-in-a-row with the 4th cell empty
+    'two': 3,          # own 2-in-a-row with the other 2 cells empty
+    'opp_three': -15,  # opponent 3-in-a-row
+    'opp_two': -3,     # opponent 2-in-a-row
+    'center': 2,       # per piece in the center column (negated for the opponent)
+}
+
+# Bump when _evaluate_board changes so cached search results are not reused
+EVAL_VERSION = 1
+
+WIN_SCORE = 1000
+
+# Plies the hard AI searches ahead
+HARD_DEPTH = 5
+
+# Half-width of the hard AI's root search window around the previous depth's score
+ASPIRATION_WINDOW = 20
+
+
+def load_weights(path):
+    """
+    Load evaluation weights from a JSON file written by tune_weights.py.
+    Missing weights fall back to DEFAULT_WEIGHTS. Weights are rounded to
+    integers so board scores stay integral.
+    """
+    with open(path) as f:
+        data = json.load(f)
+    weights = dict(DEFAULT_WEIGHTS)
+    for name in DEFAULT_WEIGHTS:
+        if name in data:
+            weights[name] = int(round(data[name]))
+    return weights
+
+
+def parse_game_record(line):
+    """
+    Parse one game record line: the columns played (1-7, e.g. 4453) and an
+    optional result for X (1 win, 0 draw, -1 loss), separated by whitespace.
+    Returns (columns, result) with 0-based columns and result None if absent,
+    or None for blank and '#' comment lines. Raises ValueError otherwise.
+    """
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
+    parts = line.split()
+    if len(parts) > 2 or not parts[0].isdigit():
+        raise ValueError(f"expected '<moves> [result]', got {line!r}")
+    result = None
+    if len(parts) == 2:
+        if parts[1] not in ('1', '0', '-1'):
+            raise ValueError(f"result must be 1, 0 or -1, got {parts[1]!r}")
+        result = int(parts[1])
+    return [int(c) - 1 for c in parts[0]], result
+
 
 class ConnectFour:
     def __init__(self):
@@ -89,6 +158,18 @@ class ConnectFour:
             row += row_step
             col += col_step
     
+    def undo_move(self, col):
+        """Take back the top piece of a column, the reverse of make_move."""
+        for row in range(self.rows):
+            if self.board[row][col] != ' ':
+                self.current_player = self.board[row][col]
+                self.board[row][col] = ' '
+                self.game_over = False
+                self.winner = None
+                return True
+        
+        return False
+    
     def get_valid_moves(self):
         """Return a list of valid column moves."""
         return [col for col in range(self.cols) if self.is_valid_move(col)]
@@ -98,12 +179,103 @@ class ConnectFour:
         return [row[:] for row in self.board]
 
 
+def _build_windows(rows, cols):
+    """Every 4-cell line on the board as a list of (row, col) cells."""
+    windows = []
+    for row in range(rows):
+        for col in range(cols - 3):
+            windows.append([(row, col + i) for i in range(4)])
+    for col in range(cols):
+        for row in range(rows - 3):
+            windows.append([(row + i, col) for i in range(4)])
+    for row in range(rows - 3):
+        for col in range(cols - 3):
+            windows.append([(row + i, col + i) for i in range(4)])
+    for row in range(3, rows):
+        for col in range(cols - 3):
+            windows.append([(row - i, col + i) for i in range(4)])
+    return windows
+
+
+WINDOWS = _build_windows(6, 7)
+
+# Zobrist keys for ConnectFourPosition.hash_key. The fixed seed keeps hashes
+# identical between runs and processes.
+_zobrist_random = random.Random(20240417)
+ZOBRIST = {(row, col, piece): _zobrist_random.getrandbits(64)
+           for row in range(6) for col in range(7) for piece in 'XO'}
+ZOBRIST_O_TO_MOVE = _zobrist_random.getrandbits(64)
+
+
+class ConnectFourPosition(Position):
+    """
+    Search adapter over a ConnectFour game, scored for the given AI.
+    Moves are played on the game itself with make_move and undo_move.
+    """
+    
+    def __init__(self, game, ai):
+        self.game = game
+        self.ai = ai
+        self.hash = ZOBRIST_O_TO_MOVE if game.current_player == 'O' else 0
+        for row in range(game.rows):
+            for col in range(game.cols):
+                if game.board[row][col] != ' ':
+                    self.hash ^= ZOBRIST[row, col, game.board[row][col]]
+    
+    def legal_moves(self):
+        return self.game.get_valid_moves()
+    
+    def play(self, col):
+        game = self.game
+        row = game.rows - 1
+        while game.board[row][col] != ' ':
+            row -= 1
+        self.hash ^= ZOBRIST[row, col, game.current_player] ^ ZOBRIST_O_TO_MOVE
+        game.make_move(col)
+    
+    def undo(self, col):
+        game = self.game
+        row = 0
+        while game.board[row][col] == ' ':
+            row += 1
+        self.hash ^= ZOBRIST[row, col, game.board[row][col]] ^ ZOBRIST_O_TO_MOVE
+        game.undo_move(col)
+    
+    def is_terminal(self):
+        return self.game.game_over
+    
+    def evaluate(self):
+        score = self.ai._evaluate_board(self.game)
+        return score if self.game.current_player == self.ai.piece else -score
+    
+    def hash_key(self):
+        return self.hash
+    
+    def order_moves(self, moves):
+        # Center columns take part in the most lines
+        center = self.game.cols // 2
+        return sorted(moves, key=lambda col: abs(col - center))
+
+
 class ConnectFourAI:
-    def __init__(self, piece, difficulty='medium'):
-        """Initialize AI with a piece ('X' or 'O') and difficulty level."""
+    def __init__(self, piece, difficulty='medium', weights=None, cache=None):
+        """
+        Initialize AI with a piece ('X' or 'O') and difficulty level.
+        weights overrides DEFAULT_WEIGHTS for the board evaluation (see load_weights).
+        cache is an optional PositionCache that keeps hard mode results between runs.
+        """
         self.piece = piece
         self.opponent_piece = 'X' if piece == 'O' else 'O'
         self.difficulty = difficulty
+        self.weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+        self.cache = cache
+        self.use_pvs = True  # principal variation search with aspiration windows in hard mode
+        self.nodes = 0       # nodes visited by the last search
+        self.score = None    # score of the last hard mode move
+        
+        # Identifies the evaluation for the cache: code version plus weights
+        digest = hashlib.sha1(json.dumps(self.weights, sort_keys=True).encode()).hexdigest()[:12]
+        self.eval_version = f"{EVAL_VERSION}-{digest}"
     
     def make_move(self, game):
         """Determine the best move based on the current game state."""
@@ -155,87 +327,234 @@ class ConnectFourAI:
         if not valid_moves:
             return None
             
-        best_score = float('-inf')
-        best_move = random.choice(valid_moves)
-        depth = 5  # Look 5 moves ahead
+        depth = HARD_DEPTH
+        
+        # Simulate moves on a copy of the game
+        position = ConnectFourPosition(self._snapshot(game), self)
+        searcher = self._searcher()
+        self.nodes = 0
         
-        # Try each valid move and pick the one with the best score
+        # A position searched in an earlier run needs no search at all
+        cached = self._cache_call('get', position.hash_key(), depth, self.eval_version)
+        if cached is not None and cached[1] in valid_moves:
+            self.score = cached[0]
+            return cached[1]
+        
+        # If there's an immediate win, choose it
         for col in valid_moves:
-            # Create a copy of the game to simulate moves
-            temp_game = ConnectFour()
-            temp_game.board = game.get_board_copy()
-            temp_game.current_player = self.piece
-            
-            # Make the move in our simulated game
-            if temp_game.make_move(col):
-                # If it's an immediate win, choose it
-                if temp_game.winner == self.piece:
-                    return col
-                    
-                # Otherwise, evaluate the move using minimax
-                score = self._minimax(temp_game, depth-1, float('-inf'), float('inf'), False)
-                
-                # Update our best move if this is better
-                if score > best_score:
-                    best_score = score
-                    best_move = col
+            position.play(col)
+            won = position.game.winner == self.piece
+            position.undo(col)
+            if won:
+                self.score = WIN_SCORE
+                return col
         
+        if self.use_pvs:
+            # Deepen one ply at a time so each root window can be centred on
+            # the previous score and the table holds good moves to try first
+            best_score = None
+            for iteration_depth in range(1, depth + 1):
+                best_move, best_score = self._aspiration_search(position, searcher, valid_moves,
+                                                                iteration_depth, best_score)
+        else:
+            best_move, best_score = self._root_search(position, searcher, valid_moves, depth,
+                                                      float('-inf'), float('inf'))
+        
+        self.nodes = searcher.nodes
+        self.score = best_score
+        self._cache_call('put', position.hash_key(), depth, self.eval_version, best_score, best_move)
         return best_move
     
-    def _minimax(self, game, depth, alpha, beta, maximizing_player):
+    def _cache_call(self, method, *args):
+        """
+        Call a PositionCache method, or return None without a cache. If the
+        cache file cannot be used the error is reported once and the AI goes
+        on searching without it.
         """
-        Recursive minimax function with alpha-beta pruning.
-        
-        Args:
-            game: Current game state
-            depth: How many moves to look ahead
-            alpha: Alpha value for pruning
-            beta: Beta value for pruning
-            maximizing_player: True if it's the AI's turn, False otherwise
+        if self.cache is None:
+            return None
+        try:
+            return getattr(self.cache, method)(*args)
+        except sqlite3.Error as error:
+            print(f"Position cache disabled ({self.cache.path}: {error})", file=sys.stderr)
+            self.cache = None
+            return None
+    
+    def _aspiration_search(self, position, searcher, valid_moves, depth, guess):
+        """
+        Root search with a window centred on guess (the previous depth's score).
+        The window widens on the side that failed until the score lands inside it.
+        Returns (best_move, best_score).
+        """
+        if guess is None:
+            return self._root_search(position, searcher, valid_moves, depth, float('-inf'), float('inf'))
+        
+        delta = ASPIRATION_WINDOW
+        alpha, beta = guess - delta, guess + delta
+        while True:
+            best_move, best_score = self._root_search(position, searcher, valid_moves, depth, alpha, beta)
+            if alpha < best_score < beta:
+                return best_move, best_score
             
-        Returns:
-            The best score for the current position
+            delta *= 4
+            if best_score <= alpha:
+                alpha = guess - delta if delta < WIN_SCORE else float('-inf')  # Fail low
+            else:
+                beta = guess + delta if delta < WIN_SCORE else float('inf')  # Fail high
+    
+    def _root_search(self, position, searcher, valid_moves, depth, alpha, beta):
         """
-        # Base cases: terminal state or maximum depth reached
-        if game.game_over or depth == 0:
-            return self._evaluate_board(game)
+        Score the root moves in column order and return (best_move, best_score).
         
-        valid_moves = game.get_valid_moves()
-        if not valid_moves:
-            return 0  # No valid moves, it's a draw
+        Without PVS every column gets its own full window. With PVS the first
+        column is searched with (alpha, beta) and the others with a null window
+        at the best score so far, re-searched only when they beat it. Ties keep
+        the earlier column either way. With PVS best_score is exact only when it
+        lies inside (alpha, beta).
+        """
+        best_score = float('-inf')
+        best_move = None
+        for col in valid_moves:
+            # The engine scores for the opponent, who moves next
+            position.play(col)
+            try:
+                if not self.use_pvs:
+                    score = -searcher.search(position, depth-1)[0]
+                elif best_move is None:
+                    score = -searcher.search(position, depth-1, -beta, -alpha)[0]
+                else:
+                    score = -searcher.search(position, depth-1, -alpha-1, -alpha)[0]
+                    if alpha < score < beta:
+                        score = -searcher.search(position, depth-1, -beta, -alpha)[0]
+            finally:
+                position.undo(col)
             
-        if maximizing_player:
-            # AI's turn (maximizing)
-            max_eval = float('-inf')
-            for col in valid_moves:
-                # Create a temporary game to simulate the move
-                temp_game = ConnectFour()
-                temp_game.board = game.get_board_copy()
-                temp_game.current_player = self.piece
-                
-                if temp_game.make_move(col):
-                    eval = self._minimax(temp_game, depth-1, alpha, beta, False)
-                    max_eval = max(max_eval, eval)
-                    alpha = max(alpha, eval)
-                    if beta <= alpha:
-                        break  # Beta cutoff
-            return max_eval
-        else:
-            # Opponent's turn (minimizing)
-            min_eval = float('inf')
-            for col in valid_moves:
-                # Create a temporary game to simulate the move
-                temp_game = ConnectFour()
-                temp_game.board = game.get_board_copy()
-                temp_game.current_player = self.opponent_piece
-                
-                if temp_game.make_move(col):
-                    eval = self._minimax(temp_game, depth-1, alpha, beta, True)
-                    min_eval = min(min_eval, eval)
-                    beta = min(beta, eval)
-                    if beta <= alpha:
-                        break  # Alpha cutoff
-            return min_eval
+            # Update our best move if this is better
+            if score > best_score:
+                best_score = score
+                best_move = col
+            
+            if self.use_pvs:
+                alpha = max(alpha, score)
+                if alpha >= beta:
+                    break
+        
+        return best_move, best_score
+    
+    def analyze(self, game, max_depth=8, stop=None):
+        """
+        Analyze the position for this AI's piece with iterative deepening.
+        
+        Yields one result per completed depth (1, 2, ... max_depth):
+            depth: search depth of this result
+            scores: {column: score} for every valid column
+            best_move: column the hard AI would play at this depth
+            best_score: score of best_move
+            best_line: expected continuation starting with best_move
+            nodes: nodes searched for this depth
+        
+        Stop early by breaking out of the loop, or by setting stop (a
+        threading.Event) from another thread; the last yielded result is the
+        best so far. The game passed in is never modified.
+        """
+        snapshot = self._snapshot(game)
+        stop = stop or threading.Event()
+        for depth in range(1, max_depth + 1):
+            try:
+                result = self._analyze_depth(snapshot, depth, stop)
+            except SearchCancelled:
+                return
+            if result is None:
+                return
+            yield result
+    
+    async def analyze_async(self, game, max_depth=8, executor=None):
+        """
+        Async version of analyze for use under asyncio.
+        
+        Each depth is searched in an executor (the loop's default thread pool
+        unless one is given) so the event loop keeps running. Leaving the
+        async for loop or cancelling the consuming task stops the search
+        running in the executor.
+        """
+        loop = asyncio.get_running_loop()
+        snapshot = self._snapshot(game)
+        stop = threading.Event()
+        try:
+            for depth in range(1, max_depth + 1):
+                try:
+                    result = await loop.run_in_executor(executor, self._analyze_depth, snapshot, depth, stop)
+                except SearchCancelled:
+                    return
+                if result is None:
+                    return
+                yield result
+        finally:
+            stop.set()
+    
+    def score_moves(self, game, depth=HARD_DEPTH):
+        """
+        Score every valid column at a fixed depth without iterative deepening.
+        Returns a result shaped like analyze()'s, or None if there is nothing to play.
+        """
+        return self._analyze_depth(self._snapshot(game), depth, threading.Event())
+    
+    def _snapshot(self, game):
+        """Copy the game with this AI to move, so analysis never touches the caller's game."""
+        snapshot = ConnectFour()
+        snapshot.board = game.get_board_copy()
+        snapshot.current_player = self.piece
+        snapshot.game_over = game.game_over
+        snapshot.winner = game.winner
+        return snapshot
+    
+    def _analyze_depth(self, game, depth, stop):
+        """
+        Score every valid column of game at the given depth.
+        Returns an analyze() result, or None if there is nothing to play.
+        Raises SearchCancelled if stop is set before or during the search.
+        """
+        if stop.is_set():
+            raise SearchCancelled()
+        valid_moves = game.get_valid_moves()
+        if game.game_over or not valid_moves:
+            return None
+        
+        position = ConnectFourPosition(game, self)
+        searcher = self._searcher(stop)
+        scores = {}
+        lines = {}
+        wins = []
+        for col in valid_moves:
+            position.play(col)
+            try:
+                if game.winner == self.piece:
+                    scores[col] = self._evaluate_board(game)
+                    lines[col] = [col]
+                    wins.append(col)
+                else:
+                    line = []
+                    scores[col] = -searcher.search(position, depth-1, line=line)[0]
+                    lines[col] = [col] + line
+            finally:
+                position.undo(col)
+        self.nodes = searcher.nodes
+        
+        # Same choice as minimax_move: an immediate win first, otherwise the
+        # first column with the highest score
+        best_move = wins[0] if wins else max(valid_moves, key=lambda col: scores[col])
+        return {
+            'depth': depth,
+            'scores': scores,
+            'best_move': best_move,
+            'best_score': scores[best_move],
+            'best_line': lines[best_move],
+            'nodes': self.nodes,
+        }
+    
+    def _searcher(self, stop=None):
+        """Search engine set up for the hard AI: table, center-first ordering and PVS."""
+        return Searcher(order=True, use_tt=True, pvs=self.use_pvs, stop=stop)
     
     def _evaluate_board(self, game):
         """
@@ -244,75 +563,50 @@ class ConnectFourAI:
         """
         # Check for terminal states first (highest priority)
         if game.winner == self.piece:
-            return 1000  # AI wins
+            return WIN_SCORE  # AI wins
         elif game.winner == self.opponent_piece:
-            return -1000  # Opponent wins
+            return -WIN_SCORE  # Opponent wins
         elif game.game_over:
             return 0  # Draw
             
         # Evaluate the board position using a heuristic
         score = 0
+        weights = self.weights
         
-        # Check for potential winning sequences
-        score += self._count_potential_wins(game, self.piece, 3) * 10  # 3-in-a-row
-        score += self._count_potential_wins(game, self.piece, 2) * 3   # 2-in-a-row
-        score -= self._count_potential_wins(game, self.opponent_piece, 3) * 15  # Block opponent 3-in-a-row
-        score -= self._count_potential_wins(game, self.opponent_piece, 2) * 3   # Block opponent 2-in-a-row
+        # Count potential winning sequences: windows of 4 holding only one
+        # player's pieces, with the rest empty
+        piece, opponent_piece = self.piece, self.opponent_piece
+        three = two = opp_three = opp_two = 0
+        board = game.board
+        for window in WINDOWS:
+            cells = [board[row][col] for row, col in window]
+            empty = cells.count(' ')
+            if empty == 1:
+                if cells.count(piece) == 3:
+                    three += 1
+                elif cells.count(opponent_piece) == 3:
+                    opp_three += 1  # Block opponent 3-in-a-row
+            elif empty == 2:
+                if cells.count(piece) == 2:
+                    two += 1
+                elif cells.count(opponent_piece) == 2:
+                    opp_two += 1  # Block opponent 2-in-a-row
+        
+        score += three * weights['three'] + two * weights['two']
+        score += opp_three * weights['opp_three'] + opp_two * weights['opp_two']
         
         # Favor center columns
         center_col = game.cols // 2
         for row in range(game.rows):
             if game.board[row][center_col] == self.piece:
-                score += 2
+                score += weights['center']
             elif game.board[row][center_col] == self.opponent_piece:
-                score -= 2
+                score -= weights['center']
         
         return score
-    
-    def _count_potential_wins(self, game, piece, length):
-        """
-        Count how many potential winning lines of the given length exist.
-        A potential winning line is a sequence that can be extended to 4 in a row.
-        """
-        count = 0
-        
-        # Check horizontal lines
-        for row in range(game.rows):
-            for col in range(game.cols - 3):
-                window = [game.board[row][col+i] for i in range(4)]
-                count += self._evaluate_window(window, piece, length)
-        
-        # Check vertical lines
-        for col in range(game.cols):
-            for row in range(game.rows - 3):
-                window = [game.board[row+i][col] for i in range(4)]
-                count += self._evaluate_window(window, piece, length)
-        
-        # Check diagonal lines (positive slope)
-        for row in range(game.rows - 3):
-            for col in range(game.cols - 3):
-                window = [game.board[row+i][col+i] for i in range(4)]
-                count += self._evaluate_window(window, piece, length)
-        
-        # Check diagonal lines (negative slope)
-        for row in range(3, game.rows):
-            for col in range(game.cols - 3):
-                window = [game.board[row-i][col+i] for i in range(4)]
-                count += self._evaluate_window(window, piece, length)
-        
-        return count
-    
-    def _evaluate_window(self, window, piece, length):
-        """
-        Evaluate a window of 4 cells for potential wins.
-        Return 1 if the window has 'length' pieces of the given type and the rest are empty.
-        """
-        if window.count(piece) == length and window.count(' ') == 4 - length:
-            return 1
-        return 0
 
 
-def main():
+def main(weights=None, cache=None):
     """Run the Connect Four game."""
     print("Welcome to Connect Four!")
     print("1. Play against a friend")
@@ -341,7 +635,7 @@ def main():
                 if 1 <= difficulty <= 3:
                     difficulty_levels = {1: 'easy', 2: 'medium', 3: 'hard'}
                     ai_piece = 'O'  # AI will be player 2
-                    ai = ConnectFourAI(ai_piece, difficulty_levels[difficulty])
+                    ai = ConnectFourAI(ai_piece, difficulty_levels[difficulty], weights, cache)
                     break
                 else:
                     print("Please enter a number between 1 and 3.")
@@ -394,4 +688,18 @@ def main():
         print("Game over! It's a draw!")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Play Connect Four in the terminal.")
+    parser.add_argument('--weights', help="JSON weights file written by tune_weights.py")
+    parser.add_argument('--cache', help="file that keeps hard AI search results between runs")
+    parser.add_argument('--cache-size', type=int, default=200000, help="positions kept in the cache file")
+    args = parser.parse_args()
+    if args.cache:
+        cache_dir = os.path.dirname(os.path.abspath(args.cache))
+        if not os.path.isdir(cache_dir):
+            parser.error(f"--cache: directory {cache_dir} does not exist")
+        if not os.access(cache_dir, os.W_OK):
+            parser.error(f"--cache: directory {cache_dir} is not writable")
+        if os.path.exists(args.cache) and not os.access(args.cache, os.W_OK):
+            parser.error(f"--cache: {args.cache} is not writable")
+    main(load_weights(args.weights) if args.weights else None,
+         PositionCache(args.cache, args.cache_size) if args.cache else None)
@@ -0,0 +1,116 @@
+"""
+Persistent on-disk cache of search results.
+
+Results are keyed by position hash, search depth and evaluation version, so
+a change to the weights or the evaluation never returns stale answers. The
+cache is a SQLite file in WAL mode: any number of processes can read while
+one writes, and writers wait for each other instead of corrupting the file.
+The file is only opened on first use, and it never holds more than
+max_entries rows: a write that would go past the cap first evicts the least
+recently used rows, inside the same transaction so concurrent writers cannot
+overshoot it.
+"""
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    hash INTEGER NOT NULL,
+    depth INTEGER NOT NULL,
+    version TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    move INTEGER,
+    used REAL NOT NULL,
+    PRIMARY KEY (hash, depth, version)
+);
+CREATE INDEX IF NOT EXISTS results_used ON results (used);
+"""
+
+
+def _signed(key):
+    """SQLite integers are signed 64-bit; fold an unsigned 64-bit hash into that range."""
+    key &= (1 << 64) - 1
+    return key - (1 << 64) if key >= 1 << 63 else key
+
+
+class PositionCache:
+    """
+    Store and look up (score, move) search results on disk.
+
+    Args:
+        path: SQLite file to use, created if missing
+        max_entries: Rows kept before the least recently used are evicted
+        timeout: Seconds to wait for another process holding the write lock
+    """
+
+    def __init__(self, path, max_entries=200000, timeout=10.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.timeout,
+                                         isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    def get(self, key, depth, version):
+        """Return the stored (score, move) for the position, or None on a miss."""
+        with self._lock:
+            connection = self._connect()
+            row = connection.execute(
+                "SELECT score, move FROM results WHERE hash = ? AND depth = ? AND version = ?",
+                (_signed(key), depth, version)).fetchone()
+            if row is None:
+                return None
+            connection.execute(
+                "UPDATE results SET used = ? WHERE hash = ? AND depth = ? AND version = ?",
+                (time.time(), _signed(key), depth, version))
+            return row[0], row[1]
+
+    def put(self, key, depth, version, score, move):
+        """Store a search result, replacing any previous one for the same key."""
+        row_key = (_signed(key), depth, version)
+        with self._lock:
+            connection = self._connect()
+            # Take the write lock up front so the count cannot change before the insert
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                self._evict(connection, row_key)
+                connection.execute(
+                    "INSERT OR REPLACE INTO results (hash, depth, version, score, move, used) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    row_key + (score, move, time.time()))
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+
+    def _evict(self, connection, row_key):
+        """Delete least recently used rows until a new row for row_key fits under the cap."""
+        count = connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        exists = connection.execute(
+            "SELECT 1 FROM results WHERE hash = ? AND depth = ? AND version = ?", row_key).fetchone()
+        excess = count + (0 if exists else 1) - self.max_entries
+        if excess > 0:
+            connection.execute(
+                "DELETE FROM results WHERE rowid IN "
+                "(SELECT rowid FROM results ORDER BY used LIMIT ?)",
+                (excess,))
+
+    def __len__(self):
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
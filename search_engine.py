@@ -0,0 +1,238 @@
+"""
+Game-agnostic alpha-beta search shared by Tic-Tac-Toe and Connect Four.
+
+A game plugs in by wrapping its state in a Position subclass. The Searcher
+runs negamax with alpha-beta pruning over it and adds, when asked, move
+ordering, a transposition table, principal variation search, tracing, a time
+limit and cooperative cancellation.
+
+Scores are always from the point of view of the side to move (negamax), so a
+game that scores boards for a fixed player flips the sign in evaluate().
+"""
+import time
+
+INF = float('inf')
+
+# Transposition table bound flags
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+class SearchCancelled(Exception):
+    """Raised inside a search when its stop event is set or its time limit runs out."""
+
+
+class Position:
+    """
+    The protocol a game implements to be searched.
+
+    play and undo must be exact inverses; the searcher always undoes every
+    move it plays, even when the search is cancelled.
+    """
+
+    def legal_moves(self):
+        """Return the moves available to the side to move, in natural order."""
+        raise NotImplementedError
+
+    def play(self, move):
+        """Make a move for the side to move."""
+        raise NotImplementedError
+
+    def undo(self, move):
+        """Take back move, which must be the last move played."""
+        raise NotImplementedError
+
+    def is_terminal(self):
+        """Return True if the game is over."""
+        raise NotImplementedError
+
+    def evaluate(self):
+        """Score the position for the side to move. Higher is better."""
+        raise NotImplementedError
+
+    def hash_key(self):
+        """Return a hashable key identifying the position, including the side to move."""
+        raise NotImplementedError
+
+    def order_moves(self, moves):
+        """Return moves sorted most promising first. Used when ordering is enabled."""
+        return moves
+
+
+class Tracer:
+    """
+    Receives search events for visualization or debugging. Override what you need.
+
+    path is the list of move indexes from the root to the node (shared with
+    the searcher, copy it to keep it). alpha and beta are the node's window
+    from the side to move's point of view.
+    """
+
+    def enter(self, position, path, ply, alpha, beta):
+        """Called before the moves of an interior node are searched."""
+
+    def leave(self, position, path, ply, alpha, beta, value, best_move):
+        """Called when a node returns, with the window it was entered with."""
+
+    def prune(self, position, path, ply, alpha, beta, moves, index):
+        """Called on a cutoff at moves[index]; moves after it are skipped."""
+
+
+class Searcher:
+    """
+    Negamax alpha-beta search over a Position.
+
+    Args:
+        prune: Cut off branches with alpha-beta (False gives plain minimax)
+        order: Search the table move first, then position.order_moves()
+        use_tt: Keep a transposition table between calls until clear()
+        pvs: Principal variation search: after the first move, prove the
+            others worse with a null window and only re-search the ones
+            that are not. Needs integer scores.
+        tracer: Optional Tracer receiving node events
+        time_limit: Seconds allowed from the first search() after clear()
+        stop: Optional threading.Event that cancels the search when set
+
+    Table entries only cut the search off at the exact depth they were stored
+    with, so enabling the table never changes a fixed-depth result. Entries
+    are not tied to a root, so clear() the table when the evaluation depends
+    on where the search started.
+    """
+
+    def __init__(self, prune=True, order=False, use_tt=False, pvs=False, tracer=None, time_limit=None, stop=None):
+        self.prune = prune
+        self.order = order
+        self.use_tt = use_tt
+        self.pvs = pvs and prune
+        self.tracer = tracer
+        self.time_limit = time_limit
+        self.stop = stop
+        self.clear()
+
+    def clear(self):
+        """Empty the transposition table, reset the counters and restart the clock."""
+        self.tt = {}
+        self.nodes = 0
+        self.prunes = 0
+        self.deadline = None
+        self._path = []
+
+    def search(self, position, depth, alpha=-INF, beta=INF, line=None):
+        """
+        Search position to depth plies.
+
+        Returns (score, best_move) for the side to move; best_move is None at
+        terminal positions or depth 0. If line is a list it receives the
+        principal variation. Raises SearchCancelled if stopped.
+        """
+        if self.time_limit is not None and self.deadline is None:
+            self.deadline = time.perf_counter() + self.time_limit
+        # Small searches may never reach the periodic check in _negamax
+        self._check_stop()
+        return self._negamax(position, depth, alpha, beta, 0, line)
+
+    def _check_stop(self):
+        if self.stop is not None and self.stop.is_set():
+            raise SearchCancelled()
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise SearchCancelled()
+
+    def _negamax(self, position, depth, alpha, beta, ply, line):
+        self.nodes += 1
+        if self.nodes & 255 == 0:
+            self._check_stop()
+
+        tracer = self.tracer
+        alpha_orig = alpha
+
+        if depth == 0 or position.is_terminal():
+            value = position.evaluate()
+            if tracer is not None:
+                tracer.leave(position, self._path, ply, alpha, beta, value, None)
+            return value, None
+
+        key = tt_move = None
+        if self.use_tt:
+            key = position.hash_key()
+            entry = self.tt.get(key)
+            if entry is not None:
+                entry_depth, value, flag, tt_move = entry
+                if entry_depth == depth and (flag == EXACT or
+                                             (flag == LOWER and value >= beta) or
+                                             (flag == UPPER and value <= alpha)):
+                    if line is not None:
+                        line[:] = self._table_line(position, depth)
+                    if tracer is not None:
+                        tracer.leave(position, self._path, ply, alpha, beta, value, tt_move)
+                    return value, tt_move
+
+        moves = position.legal_moves()
+        if not moves:
+            value = position.evaluate()
+            if tracer is not None:
+                tracer.leave(position, self._path, ply, alpha, beta, value, None)
+            return value, None
+
+        if self.order:
+            moves = position.order_moves(moves)
+            if tt_move is not None and tt_move in moves:
+                moves = [tt_move] + [move for move in moves if move != tt_move]
+
+        if tracer is not None:
+            tracer.enter(position, self._path, ply, alpha, beta)
+
+        best_value = -INF
+        best_move = None
+        for index, move in enumerate(moves):
+            child_line = [] if line is not None else None
+            position.play(move)
+            self._path.append(index)
+            try:
+                if self.pvs and index > 0:
+                    value = -self._negamax(position, depth - 1, -alpha - 1, -alpha, ply + 1, None)[0]
+                    if alpha < value < beta:
+                        value = -self._negamax(position, depth - 1, -beta, -alpha, ply + 1, child_line)[0]
+                    elif child_line is not None:
+                        child_line = []
+                else:
+                    value = -self._negamax(position, depth - 1, -beta, -alpha, ply + 1, child_line)[0]
+            finally:
+                self._path.pop()
+                position.undo(move)
+
+            if value > best_value:
+                best_value, best_move = value, move
+                if line is not None:
+                    line[:] = [move] + child_line
+            alpha = max(alpha, value)
+
+            if self.prune and alpha >= beta:
+                self.prunes += 1
+                if tracer is not None:
+                    tracer.prune(position, self._path, ply, alpha, beta, moves, index)
+                break
+
+        if self.use_tt:
+            if best_value <= alpha_orig:
+                flag = UPPER
+            elif best_value >= beta:
+                flag = LOWER
+            else:
+                flag = EXACT
+            self.tt[key] = (depth, best_value, flag, best_move)
+
+        if tracer is not None:
+            tracer.leave(position, self._path, ply, alpha_orig, beta, best_value, best_move)
+        return best_value, best_move
+
+    def _table_line(self, position, depth):
+        """Follow the table's best moves from position to rebuild a principal variation."""
+        line = []
+        while len(line) < depth and not position.is_terminal():
+            entry = self.tt.get(position.hash_key())
+            if entry is None or entry[3] is None or entry[3] not in position.legal_moves():
+                break
+            position.play(entry[3])
+            line.append(entry[3])
+        for move in reversed(line):
+            position.undo(move)
+        return line
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Offline tuner for the Connect Four evaluation weights.
+
+Reads game records, replays every position, extracts the window-count
+features used by ConnectFourAI._evaluate_board in vectorized batches and fits
+the weights against the final results. Features and results are taken from
+the side that has just moved, so the opponent (to move) may be weighted
+differently from the player's own threats, as at the hard AI's search leaves. The result is a JSON weights file
+that connect_four.py loads with --weights.
+
+Game record format, one game per line:
+    <moves> <result>
+where <moves> is the sequence of columns played (1-7, e.g. 4453) and
+<result> is 1 if X won, 0 for a draw and -1 if O won. Blank lines and lines
+starting with '#' are ignored.
+
+Usage:
+    python tune_weights.py games.txt [--method logistic|texel] [--output weights.json]
+
+Requires numpy.
+"""
+import argparse
+import json
+import math
+import sys
+import time
+
+import numpy as np
+
+from connect_four import DEFAULT_WEIGHTS, WINDOWS as BOARD_WINDOWS, ConnectFour, parse_game_record
+
+ROWS, COLS = 6, 7
+FEATURES = ['three', 'two', 'opp_three', 'opp_two', 'center']
+
+# Flat cell indices of every 4-cell window, in the order ConnectFourAI counts them
+WINDOWS = np.array([[row * COLS + col for row, col in window] for window in BOARD_WINDOWS], dtype=np.intp)
+CENTER_CELLS = np.array([row * COLS + COLS // 2 for row in range(ROWS)], dtype=np.intp)
+
+
+def replay(columns):
+    """
+    Replay a game and return (board, player who just moved) for every
+    non-terminal position. Boards are 42 character strings (row by row, top
+    row first).
+    """
+    game = ConnectFour()
+    positions = []
+    for col in columns:
+        if game.game_over:
+            break
+        mover = game.current_player
+        if not game.make_move(col):
+            raise ValueError(f"illegal move in column {col + 1}")
+        if not game.game_over:
+            positions.append((''.join(''.join(row) for row in game.board), mover))
+    return positions
+
+
+def extract_features(boards, movers):
+    """
+    Count evaluation features for a batch of board strings, each from the
+    point of view of its player in movers ('X' or 'O'), the side that has
+    just moved. Returns an (n, len(FEATURES)) int array in FEATURES order.
+    """
+    cells = np.frombuffer(''.join(boards).encode('ascii'), dtype=np.uint8).reshape(-1, ROWS * COLS)
+    pieces = np.frombuffer(''.join(movers).encode('ascii'), dtype=np.uint8)[:, None]
+    empty = cells == ord(' ')
+    own = cells == pieces
+    opp = ~empty & ~own
+
+    own_count = own[:, WINDOWS].sum(axis=2)
+    opp_count = opp[:, WINDOWS].sum(axis=2)
+    empty_count = empty[:, WINDOWS].sum(axis=2)
+
+    features = np.empty((len(cells), len(FEATURES)), dtype=np.int32)
+    features[:, 0] = ((own_count == 3) & (empty_count == 1)).sum(axis=1)
+    features[:, 1] = ((own_count == 2) & (empty_count == 2)).sum(axis=1)
+    features[:, 2] = ((opp_count == 3) & (empty_count == 1)).sum(axis=1)
+    features[:, 3] = ((opp_count == 2) & (empty_count == 2)).sum(axis=1)
+    features[:, 4] = own[:, CENTER_CELLS].sum(axis=1) - opp[:, CENTER_CELLS].sum(axis=1)
+    return features
+
+
+def load_corpus(path, batch_size=100000, min_ply=0):
+    """
+    Stream game records from path and extract features in batches.
+    Returns (features, labels) where labels are the score of the player who
+    has just moved: 1 win, 0.5 draw, 0 loss.
+    """
+    feature_batches, label_batches = [], []
+    boards, movers, labels = [], [], []
+    games = 0
+
+    def flush():
+        if boards:
+            feature_batches.append(extract_features(boards, movers))
+            label_batches.append(np.array(labels, dtype=np.float64))
+            boards.clear()
+            movers.clear()
+            labels.clear()
+
+    with open(path) as f:
+        for line_number, line in enumerate(f, 1):
+            try:
+                record = parse_game_record(line)
+                if record is None:
+                    continue
+                columns, result = record
+                if result is None:
+                    raise ValueError("missing result")
+                positions = replay(columns)[min_ply:]
+            except ValueError as error:
+                print(f"{path}:{line_number}: skipped ({error})", file=sys.stderr)
+                continue
+
+            games += 1
+            for board, mover in positions:
+                boards.append(board)
+                movers.append(mover)
+                labels.append((result + 1) / 2 if mover == 'X' else (1 - result) / 2)
+            if len(boards) >= batch_size:
+                flush()
+    flush()
+
+    if not feature_batches:
+        raise ValueError(f"no usable positions in {path}")
+    features = np.concatenate(feature_batches)
+    labels = np.concatenate(label_batches)
+    print(f"Loaded {len(features)} positions from {games} games")
+    return features, labels
+
+
+def sigmoid(x):
+    return 1 / (1 + np.exp(-x))
+
+
+def texel_error(features, labels, weights, k):
+    """Mean squared error between results and sigmoid(score / k)."""
+    return float(np.mean((labels - sigmoid(features @ weights / k)) ** 2))
+
+
+def fit_scale(features, labels, weights):
+    """
+    Find the scale k that best maps the given weights' scores onto results.
+    Fixing k to the current weights keeps tuned weights in the same units.
+    """
+    low, high = math.log(1.0), math.log(10000.0)
+    for _ in range(60):  # golden-section search on log(k)
+        a = high - (high - low) / 1.618
+        b = low + (high - low) / 1.618
+        if texel_error(features, labels, weights, math.exp(a)) < texel_error(features, labels, weights, math.exp(b)):
+            high = b
+        else:
+            low = a
+    return math.exp((low + high) / 2)
+
+
+def fit_logistic(features, labels, k, weights, iterations=50, ridge=1e-6):
+    """Fit weights by logistic regression (Newton's method) with the scale k held fixed."""
+    x = features / k
+    w = weights / 1.0
+    for _ in range(iterations):
+        p = sigmoid(x @ w)
+        gradient = x.T @ (p - labels) / len(x) + ridge * w
+        hessian = (x * (p * (1 - p))[:, None]).T @ x / len(x) + ridge * np.eye(len(w))
+        step = np.linalg.solve(hessian, gradient)
+        w -= step
+        if np.max(np.abs(step)) < 1e-6:
+            break
+    return np.round(w)
+
+
+def fit_texel(features, labels, k, weights, max_passes=100):
+    """Texel-style local search: nudge each integer weight by +-1 while the error drops."""
+    w = np.round(weights)
+    best = texel_error(features, labels, w, k)
+    for _ in range(max_passes):
+        improved = False
+        for i in range(len(w)):
+            for delta in (1, -1):
+                candidate = w.copy()
+                candidate[i] += delta
+                error = texel_error(features, labels, candidate, k)
+                if error < best:
+                    w, best = candidate, error
+                    improved = True
+                    break
+        if not improved:
+            break
+    return w
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune Connect Four evaluation weights from game records.")
+    parser.add_argument('corpus', help="game records, one '<moves> <result>' per line")
+    parser.add_argument('--method', choices=['logistic', 'texel'], default='logistic')
+    parser.add_argument('--output', default='weights.json', help="weights file to write")
+    parser.add_argument('--min-ply', type=int, default=0, help="skip this many opening positions per game")
+    parser.add_argument('--batch-size', type=int, default=100000, help="positions per feature extraction batch")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    features, labels = load_corpus(args.corpus, args.batch_size, args.min_ply)
+    features = features.astype(np.float64)
+    print(f"Extracted features in {time.perf_counter() - start:.1f}s")
+
+    initial = np.array([DEFAULT_WEIGHTS[name] for name in FEATURES], dtype=np.float64)
+    k = fit_scale(features, labels, initial)
+    initial_error = texel_error(features, labels, initial, k)
+
+    if args.method == 'logistic':
+        weights = fit_logistic(features, labels, k, initial)
+    else:
+        weights = fit_texel(features, labels, k, initial)
+    error = texel_error(features, labels, weights, k)
+
+    print(f"Scale k = {k:.2f}, error {initial_error:.6f} -> {error:.6f}")
+    for name, before, after in zip(FEATURES, initial, weights):
+        print(f"  {name:<10} {int(before):>5} -> {int(after):>5}")
+
+    output = {name: int(value) for name, value in zip(FEATURES, weights)}
+    output['tuning'] = {
+        'method': args.method,
+        'positions': len(features),
+        'scale': round(k, 4),
+        'error': round(error, 6),
+    }
+    with open(args.output, 'w') as f:
+        json.dump(output, f, indent=2)
+        f.write('\n')
+    print(f"Wrote {args.output} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()